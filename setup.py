@@ -5,7 +5,7 @@ setuptools.setup(
     name="surveillance_bot",
     version="1.1.1",
     packages=['surveillance_bot'],
-    install_requires=["python-telegram-bot>=13,<14", "opencv-python-headless>=4,<5"],
+    install_requires=["python-telegram-bot>=13.2,<14", "opencv-python-headless>=4,<5"],
     python_requires='>=3.6, <3.10',
     entry_points={
         'console_scripts': [
@@ -3,34 +3,124 @@ Module for bot related functionality.
 
 This module implements the `Bot` class that manage the communication between
 the user (through a telegram chat) and the camera.
+
+Performance characteristics:
+    The bot is network bound, every message, chat action or upload is an
+    HTTPS request to the Bot API, so the work done in Python is negligible
+    compared with it. Optimizations here aim to issue fewer and earlier
+    requests:
+        * Surveillance photos waiting to be sent are grouped into albums.
+        * Camera capture and uploads run in separated threads.
+        * Repeated chat actions are skipped and sent without waiting.
+        * Static texts and keyboards are built only once.
+    Telegram flood limits are handled by retrying after the delay it asks
+    for.
 """
-import inspect
 import logging
 import os
 import sys
-from functools import wraps
-from typing import Any, Callable, Optional, Union
+from collections import OrderedDict
+from functools import partial
+from queue import Full, Queue
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import (
+    Any,
+    IO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
 
-from telegram import ChatAction, ParseMode, ReplyKeyboardMarkup, Update
+from telegram import (
+    ChatAction,
+    InputMediaPhoto,
+    Message,
+    ParseMode,
+    ReplyKeyboardMarkup,
+    Update
+)
 from telegram.ext import (
     CallbackContext,
     CommandHandler,
     Dispatcher,
+    Filters,
+    MessageFilter,
+    MessageHandler,
     PicklePersistence,
     Updater
 )  # type: ignore
+from telegram.error import RetryAfter
 
-from surveillance_bot.bot_config import BotConfig
+from surveillance_bot.bot_config import BotConfig, HandlerType
 from surveillance_bot.camera import (
     Camera,
     CameraConnectionError,
     CodecNotAvailable
 )
 
-HandlerType = Callable[[Update, CallbackContext], Any]
+logger = logging.getLogger(__name__)
+
+# Static MarkdownV2 messages, escaped only once.
+_HELP_TEXT = (
+    "With this bot, photos or videos can be taken with the cam "
+    "upon request|. A surveillance mode is also included|. This "
+    "mode warns you when it detects movement and it will start "
+    "recording a video|. Whilst recording, photos will be taken "
+    "and sent periodically|.\n"
+    "\n"
+    "These are the available commands:\n"
+    "\n"
+    "*On Demand commands*\n"
+    "/get|_photo |- Takes a picture from the cam\n"
+    "/get|_video |- Takes a video from the cam\n"
+    "\n"
+    "*Surveillance Mode commands*\n"
+    "/surveillance|_start |- Starts surveillance mode\n"
+    "/surveillance|_stop |- Stops surveillance mode\n"
+    "/surveillance|_status |- Indicates if surveillance mode "
+    "is active or not\n"
+    "\n"
+    "*General commands*\n"
+    "/config |- Invokes configuration menu\n"
+    "/stop|_config |- Abort configuration sequence\n"
+    "/help |- Shows this help text\n"
+).replace('|', '\\')
+_MOTION_TEXT = '*MOTION DETECTED|!*'.replace('|', '\\')
+_ERROR_TEXT = (
+    "*ERROR|!* Unknown bot internal error, see server logs "
+    "for more information|."
+).replace('|', '\\')
+
+
+class _UsernameFilter(MessageFilter):
+    """
+    Filter for messages from chats of the given usernames.
 
+    Telegram usernames are case insensitive, so they are compared in lower
+    case against a precomputed set.
 
-class Bot:
+    Args:
+        *usernames: Usernames to be allowed (with or without @).
+    """
+
+    def __init__(self, *usernames: str) -> None:
+        self.usernames = frozenset(
+            username.lstrip('@').lower() for username in usernames
+        )
+
+    def filter(self, message: Message) -> bool:
+        """Checks whether the message comes from an allowed username."""
+        username = message.chat.username
+        return username is not None and username.lower() in self.usernames
+
+
+# Every attribute is a setting or state shared between handlers
+class Bot:  # pylint: disable=too-many-instance-attributes
     """
     Class for the telegram bot implementation.
 
@@ -40,25 +130,93 @@ class Bot:
     Args:
         token: Access Token for the telegram bot.
         username: Username of the only user authorized to interact with the
-            bot (without @).
+            bot (case insensitive, with or without @).
+        persistence_dir: Directory where bot configuration is persisted.
         log_level: Logging level for logging module.
+        webhook_url: Public base URL for receiving updates through a webhook
+            instead of polling them.
+        webhook_port: Local port where the webhook server listens.
+        api_url: Base URL of a self-hosted Bot API server to use instead of
+            the Telegram one.
     """
-    def __init__(
+
+    __slots__ = (
+        'camera',
+        'webhook_url',
+        'webhook_port',
+        'updater',
+        '_authorized',
+        '_last_chat_action',
+        '_unauthorized_replies',
+        '_surveillance_lock'
+    )
+
+    CHAT_ACTION_DURATION = 4.0
+    """Seconds during which a sent chat action is considered still shown."""
+
+    MEDIA_GROUP_SIZE = 10
+    """Maximum number of photos sent together in a single album."""
+
+    EVENTS_QUEUE_SIZE = 20
+    """Maximum number of surveillance events waiting to be sent."""
+
+    CONNECTION_POOL_SIZE = 16
+    """Number of HTTP connections kept alive with the Telegram API."""
+
+    POLLING_TIMEOUT = 50
+    """Seconds that Telegram holds a long polling request without updates."""
+
+    ALLOWED_UPDATES = ['message', 'callback_query']
+    """Update types requested to Telegram (commands and configuration menu)."""
+
+    UNAUTHORIZED_REPLY_INTERVAL = 60.0
+    """Minimum seconds between "Unauthorized" replies to the same chat."""
+
+    # Reply keyboards for active and idle surveillance mode
+    _KEYBOARD_ACTIVE = ReplyKeyboardMarkup(
+        [['/get_photo', '/get_video'], ['/surveillance_stop']],
+        resize_keyboard=True
+    )
+    _KEYBOARD_IDLE = ReplyKeyboardMarkup(
+        [['/get_photo', '/get_video'], ['/surveillance_start']],
+        resize_keyboard=True
+    )
+
+    # Commands handled by `_command_<name>` methods
+    _COMMANDS = (
+        'start',
+        'help',
+        'surveillance_stop',
+        'surveillance_status'
+    )
+
+    # Commands handled asynchronously by `_async_command_<name>` methods
+    _ASYNC_COMMANDS = (
+        'get_photo',
+        'get_video',
+        'surveillance_start'
+    )
+
+    # Arguments mirror the environment variables read by main
+    def __init__(  # pylint: disable=too-many-arguments
             self,
             token: str,
             username: str,
             persistence_dir: Optional[str] = None,
-            log_level: Union[int, str, None] = None
+            log_level: Union[int, str, None] = None,
+            *,
+            webhook_url: Optional[str] = None,
+            webhook_port: int = 8443,
+            api_url: Optional[str] = None
     ) -> None:
-        self.logger = logging.getLogger(__name__)
         if log_level:
-            self.logger.setLevel(log_level)
+            logger.setLevel(log_level)
 
         if not token:
-            self.logger.critical("Error! Missing BOT_API_KEY configuration")
+            logger.critical("Error! Missing BOT_API_KEY configuration")
             sys.exit(1)
         if not username:
-            self.logger.critical(
+            logger.critical(
                 "Error! Missing AUTHORIZED_USER configuration"
             )
             sys.exit(1)
@@ -66,15 +224,21 @@ class Bot:
         try:
             self.camera = Camera()
         except CameraConnectionError:
-            self.logger.critical("Error! Can not connect to the camera.")
+            logger.critical("Error! Can not connect to the camera.")
             sys.exit(2)
         except CodecNotAvailable:
-            self.logger.critical(
+            logger.critical(
                 "Error! There are no suitable video codec available."
             )
             sys.exit(2)
 
-        self.authorized_user = username
+        self.webhook_url = webhook_url
+        self.webhook_port = webhook_port
+        self._authorized = _UsernameFilter(username)
+        self._last_chat_action: Dict[int, Tuple[str, float]] = {}
+        self._unauthorized_replies: 'OrderedDict[int, float]' = \
+            OrderedDict()
+        self._surveillance_lock = Lock()
 
         persistence: Optional[PicklePersistence]
         if persistence_dir:
@@ -84,26 +248,49 @@ class Bot:
         else:
             persistence = None
 
+        base_url: Optional[str] = None
+        base_file_url: Optional[str] = None
+        if api_url:
+            base_url = f'{api_url.rstrip("/")}/bot'
+            base_file_url = f'{api_url.rstrip("/")}/file/bot'
+
         self.updater = Updater(
             token=token,
+            base_url=base_url,
+            base_file_url=base_file_url,
             persistence=persistence,
-            use_context=True
+            use_context=True,
+            request_kwargs={'con_pool_size': self.CONNECTION_POOL_SIZE}
         )
 
         dispatcher: Dispatcher = self.updater.dispatcher
 
+        # Loads defaults configuration options (bot data is already restored
+        # from persistence at this point)
+        BotConfig.ensure_defaults(dispatcher.bot_data)
+
         # Registers commands in the dispatcher
-        for name, method in inspect.getmembers(self, inspect.ismethod):
-            if name.startswith('_command_'):
-                command = name.replace('_command_', '')
-                dispatcher.add_handler(self.command_handler(command, method))
-            if name.startswith('_async_command_'):
-                command = name.replace('_async_command_', '')
-                dispatcher.add_handler(self.command_handler(command, method, run_async=True))
+        for command in self._COMMANDS:
+            dispatcher.add_handler(self.command_handler(
+                command,
+                getattr(self, f'_command_{command}')
+            ))
+        for command in self._ASYNC_COMMANDS:
+            dispatcher.add_handler(self.command_handler(
+                command,
+                getattr(self, f'_async_command_{command}'),
+                run_async=True
+            ))
 
         # Registers configuration menu
         dispatcher.add_handler(BotConfig.get_config_handler(self))
 
+        # Registers handler for commands sent by unauthorized users
+        dispatcher.add_handler(MessageHandler(
+            Filters.command & ~self._authorized,
+            self._unauthorized
+        ))
+
         # Register error handler
         dispatcher.add_error_handler(self._error)
 
@@ -114,10 +301,11 @@ class Bot:
             **kwargs
     ) -> CommandHandler:
         """
-        Decorates callback and returns a CommandHandler.
+        Returns a CommandHandler that dispatches the command to callback.
 
-        This decorator restricts command use to the authorized user, loads
-        defaults configuration options and adds debug logging.
+        The handler filters out updates from chats other than the authorized
+        user one, so unauthorized calls are discarded by the dispatcher
+        before the callback is invoked.
 
         Args:
             command: The command this handler should listen for.
@@ -126,62 +314,154 @@ class Bot:
         Returns:
             Handler instance to handle Telegram commands.
         """
-        logger = self.logger
+        return CommandHandler(
+            command,
+            partial(self._dispatch_command, command, callback),
+            filters=self._authorized,
+            **kwargs
+        )
 
-        @wraps(callback)
-        def wrapped(update: Update, context: CallbackContext) -> Any:
+    def _dispatch_command(
+            self,
+            command: str,
+            callback: HandlerType,
+            update: Update,
+            context: CallbackContext
+    ) -> Any:
+        """
+        Adds debug logging to the command callback and invokes it.
 
-            # Checks if user is authorized
-            if update.effective_chat.username != self.authorized_user:
-                logger.warning(
-                    'Unauthorized call to "%s" command by @%s',
-                    command,
-                    update.effective_chat.username
-                )
-                update.message.reply_text(text="Unauthorized")
-                return None
+        Args:
+            command: The command being handled.
+            callback: The callback function for the command.
+            update: The update to be handled.
+            context: The context object for the update.
+
+        Returns:
+            Value returned by the callback.
+        """
+        logger.debug('Received "%s" command', command)
+        return callback(update, context)
 
-            BotConfig.ensure_defaults(context)
-            logger.debug('Received "%s" command', command)
-            return callback(update, context)
+    def _unauthorized(self, update: Update, _: CallbackContext) -> None:
+        """
+        Handler for commands sent by unauthorized users.
 
-        return CommandHandler(command, wrapped, **kwargs)
+        Every call is logged, but the chat is answered at most once every
+        `UNAUTHORIZED_REPLY_INTERVAL` seconds, so probing the bot does not
+        make it send a message per command.
+
+        Args:
+            update: The update to be handled.
+        """
+        logger.warning(
+            'Unauthorized call to "%s" command by @%s',
+            update.message.text.split()[0],
+            update.effective_chat.username
+        )
+        # Replies are stored in time order, so expired ones are at the
+        # beginning and are removed to keep the record bounded
+        now = monotonic()
+        replies = self._unauthorized_replies
+        while replies and now - next(iter(replies.values())) \
+                >= self.UNAUTHORIZED_REPLY_INTERVAL:
+            replies.popitem(last=False)
+        chat_id = update.effective_chat.id
+        if chat_id in replies:
+            return
+        replies[chat_id] = now
+        update.message.reply_text(text="Unauthorized")
 
     def start(self) -> None:
         """
         Starts the bot execution and waits to clean up before exit.
 
-        After starting the camera and the bot polling it waits into a loop
-        until the bot is interrupted by a signal. After that the camera
+        After starting the camera and the bot updates reception (via webhook
+        if `webhook_url` is set or via polling otherwise) it waits into a
+        loop until the bot is interrupted by a signal. After that the camera
         device is released and the function ends.
         """
         self.camera.start()
-        self.updater.start_polling()
-        self.logger.info("Surveillance Bot started")
+        if self.webhook_url:
+            # Token is used as URL path so only Telegram knows the endpoint
+            token = self.updater.bot.token
+            self.updater.start_webhook(
+                listen='0.0.0.0',
+                port=self.webhook_port,
+                url_path=token,
+                webhook_url=f'{self.webhook_url.rstrip("/")}/{token}',
+                allowed_updates=self.ALLOWED_UPDATES
+            )
+        else:
+            self.updater.start_polling(
+                timeout=self.POLLING_TIMEOUT,
+                allowed_updates=self.ALLOWED_UPDATES
+            )
+        logger.info("Surveillance Bot started")
 
         self.updater.idle()
 
         self.camera.stop()
-        self.logger.info("Surveillance Bot stopped")
+        logger.info("Surveillance Bot stopped")
 
-    def _error(self, update: Union[Update, object], context: CallbackContext) -> None:
+    def _error(
+            self,
+            update: Union[Update, object],
+            context: CallbackContext
+    ) -> None:
         """
         Logs Errors caused by updates.
 
+        The user is notified when the error comes from a chat update. Errors
+        raised by asynchronous calls without update (like chat actions) are
+        only logged.
+
         Args:
             update: The update to be handled.
             context: The context object for the update.
         """
-        self.logger.warning(
+        logger.warning(
             'Update "%s" caused error "%s"',
             update,
             context.error
         )
-        context.bot.send_message(
-            chat_id=update.effective_chat.id,  # type: ignore
-            text="*ERROR|!* Unknown bot internal error, see server logs "
-                 "for more information|.".replace('|', '\\'),
-            parse_mode=ParseMode.MARKDOWN_V2
+        chat = getattr(update, 'effective_chat', None)
+        if chat:
+            context.bot.send_message(
+                chat_id=chat.id,
+                text=_ERROR_TEXT,
+                parse_mode=ParseMode.MARKDOWN_V2
+            )
+
+    def _send_chat_action(
+            self,
+            context: CallbackContext,
+            chat_id: int,
+            action: str
+    ) -> None:
+        """
+        Sends a chat action unless it is already being shown.
+
+        Telegram keeps showing a chat action for about 5 seconds, so sending
+        the same action again within that period is a wasted request. The
+        request is sent asynchronously, so the caller can go on recording or
+        uploading without waiting for it.
+
+        Args:
+            context: The context object for the update.
+            chat_id: Unique identifier of the target chat.
+            action: Type of action to broadcast.
+        """
+        now = monotonic()
+        last_action, last_time = self._last_chat_action.get(chat_id, ('', 0))
+        if action == last_action \
+                and now - last_time < self.CHAT_ACTION_DURATION:
+            return
+        self._last_chat_action[chat_id] = (action, now)
+        context.dispatcher.run_async(
+            context.bot.send_chat_action,
+            chat_id=chat_id,
+            action=action
         )
 
     def _command_start(self, update: Update, context: CallbackContext) -> None:
@@ -205,7 +485,7 @@ class Bot:
             is_active: Optional[bool] = None
     ) -> ReplyKeyboardMarkup:
         """
-        Generates Reply Keyboard content.
+        Selects Reply Keyboard content.
 
         Args:
             is_active: Overrides surveillance mode status.
@@ -216,19 +496,7 @@ class Bot:
         """
         active = self.camera.is_surveillance_active \
             if is_active is None else is_active
-        custom_keyboard = [
-            [
-                '/get_photo',
-                '/get_video'
-            ],
-            [
-                f"/surveillance_{'stop' if active else 'start'}"
-            ]
-        ]
-        return ReplyKeyboardMarkup(
-            custom_keyboard,
-            resize_keyboard=True
-        )
+        return self._KEYBOARD_ACTIVE if active else self._KEYBOARD_IDLE
 
     def _command_help(
             self,
@@ -244,34 +512,12 @@ class Bot:
             update: The update to be handled.
         """
         update.message.reply_text(
-            text="With this bot, photos or videos can be taken with the cam "
-                 "upon request|. A surveillance mode is also included|. This "
-                 "mode warns you when it detects movement and it will start "
-                 "recording a video|. Whilst recording, photos will be taken "
-                 "and sent periodically|.\n"
-                 "\n"
-                 "These are the available commands:\n"
-                 "\n"
-                 "*On Demand commands*\n"
-                 "/get|_photo |- Takes a picture from the cam\n"
-                 "/get|_video |- Takes a video from the cam\n"
-                 "\n"
-                 "*Surveillance Mode commands*\n"
-                 "/surveillance|_start |- Starts surveillance mode\n"
-                 "/surveillance|_stop |- Stops surveillance mode\n"
-                 "/surveillance|_status |- Indicates if surveillance mode "
-                 "is active or not\n"
-                 "\n"
-                 "*General commands*\n"
-                 "/config |- Invokes configuration menu\n"
-                 "/stop|_config |- Abort configuration sequence\n"
-                 "/help |- Shows this help text\n"
-                 "".replace('|', '\\'),
+            text=_HELP_TEXT,
             parse_mode=ParseMode.MARKDOWN_V2,
             reply_markup=self._get_reply_keyboard()
         )
 
-    def _command_get_photo(
+    def _async_command_get_photo(
             self,
             update: Update,
             context: CallbackContext
@@ -279,7 +525,8 @@ class Bot:
         """
         Handler for `/get_photo` command.
 
-        It takes a single shot and sends it to the user.
+        It takes a single shot and sends it to the user. This handler runs
+        asynchronously so the upload doesn't block the dispatcher thread.
 
         Args:
             update: The update to be handled.
@@ -289,16 +536,12 @@ class Bot:
         timestamp = context.bot_data[BotConfig.TIMESTAMP]
 
         # Uploads photo
-        context.bot.send_chat_action(
-            chat_id=update.message.chat_id,
-            action=ChatAction.UPLOAD_PHOTO
-        )
         context.bot.send_photo(
             chat_id=update.message.chat_id,
             photo=self.camera.get_photo(timestamp=timestamp)
         )
 
-    def _command_get_video(
+    def _async_command_get_video(
             self,
             update: Update,
             context: CallbackContext
@@ -306,7 +549,9 @@ class Bot:
         """
         Handler for `/get_video` command.
 
-        It takes a video and sends it to the user.
+        It takes a video and sends it to the user. This handler runs
+        asynchronously so the recording and the upload don't block the
+        dispatcher thread.
 
         Args:
             update: The update to be handled.
@@ -322,21 +567,15 @@ class Bot:
         )
 
         # Records video
-        context.bot.send_chat_action(
-            chat_id=update.message.chat_id,
-            action=ChatAction.RECORD_VIDEO
+        self._send_chat_action(
+            context,
+            update.message.chat_id,
+            ChatAction.RECORD_VIDEO
         )
         video = self.camera.get_video(timestamp=timestamp, seconds=seconds)
 
         # Uploads video
-        context.bot.send_chat_action(
-            chat_id=update.message.chat_id,
-            action=ChatAction.UPLOAD_VIDEO
-        )
-        context.bot.send_video(
-            chat_id=update.message.chat_id,
-            video=video
-        )
+        self._send_video(context, update.message.chat_id, video)
 
         # Deletes waiting message
         context.bot.delete_message(
@@ -362,14 +601,34 @@ class Bot:
             update: The update to be handled.
             context: The context object for the update.
         """
-        # Check if surveillance is already started
-        if self.camera.is_surveillance_active:
+        # Check if surveillance is already started (the lock is held until
+        # it stops, so concurrent calls can not start it twice). A with block
+        # can not be used because a busy lock must not be waited for.
+        lock = self._surveillance_lock
+        if not lock.acquire(blocking=False):  # pylint: disable=R1732
             update.message.reply_text(
                 text='Error! Surveillance is already started'
             )
-            self.logger.warning("Surveillance already started")
+            logger.warning("Surveillance already started")
             return
 
+        try:
+            self._surveillance(update, context)
+        finally:
+            lock.release()
+
+    def _surveillance(
+            self,
+            update: Update,
+            context: CallbackContext
+    ) -> None:
+        """
+        Runs the surveillance mode until it is stopped.
+
+        Args:
+            update: The update to be handled.
+            context: The context object for the update.
+        """
         # Retrieve configuration
         timestamp = context.bot_data[BotConfig.TIMESTAMP]
         video_seconds = context.bot_data[BotConfig.SRV_VIDEO_DURATION]
@@ -377,72 +636,254 @@ class Bot:
         motion_contours = context.bot_data[BotConfig.SRV_MOTION_CONTOURS]
 
         # Starts surveillance
+        chat_id = update.message.chat_id
+        reply_text = update.message.reply_text
+        bot = context.bot
         waiting_message = None
-        self.logger.info('Surveillance mode start')
-        update.message.reply_text(
+        logger.info('Surveillance mode start')
+        reply_text(
             text="Surveillance mode started",
             reply_markup=self._get_reply_keyboard(True)
         )
-        for data in self.camera.surveillance_start(
+        for data in self._surveillance_events(
                 timestamp=timestamp,
                 video_seconds=video_seconds,
                 picture_seconds=picture_interval,
                 contours=motion_contours
         ):
             if 'detected' in data:
-                update.message.reply_text(
-                    text='*MOTION DETECTED|!*'.replace('|', '\\'),
+                reply_text(
+                    text=_MOTION_TEXT,
                     parse_mode=ParseMode.MARKDOWN_V2
                 )
-                waiting_message = update.message.reply_text(
+                waiting_message = reply_text(
                     text=f'Recording a {video_seconds} seconds video and '
                          f'taking {video_seconds // picture_interval} '
                          f'photos...'
                 )
-                context.bot.send_chat_action(
-                    chat_id=update.message.chat_id,
-                    action=ChatAction.RECORD_VIDEO
-                )
-            if 'photo' in data:
-                context.bot.send_chat_action(
-                    chat_id=update.message.chat_id,
-                    action=ChatAction.UPLOAD_PHOTO
+                self._send_chat_action(
+                    context,
+                    chat_id,
+                    ChatAction.RECORD_VIDEO
                 )
-                context.bot.send_photo(
-                    chat_id=update.message.chat_id,
-                    photo=data['photo'],
-                    caption=f'Capture {data["id"]}/{data["total"]}'
-                )
-                context.bot.send_chat_action(
-                    chat_id=update.message.chat_id,
-                    action=ChatAction.RECORD_VIDEO
+            if 'photos' in data:
+                self._send_chat_action(
+                    context,
+                    chat_id,
+                    ChatAction.UPLOAD_PHOTO
                 )
+                self._send_photos(context, chat_id, data['photos'])
             if 'video' in data:
-                context.bot.send_chat_action(
-                    chat_id=update.message.chat_id,
-                    action=ChatAction.UPLOAD_VIDEO
-                )
-                context.bot.send_video(
-                    chat_id=update.message.chat_id,
-                    video=data['video']
+                self._send_chat_action(
+                    context,
+                    chat_id,
+                    ChatAction.UPLOAD_VIDEO
                 )
+                self._send_video(context, chat_id, data['video'])
                 if waiting_message:
-                    context.bot.delete_message(
-                        chat_id=update.message.chat_id,
+                    bot.delete_message(
+                        chat_id=chat_id,
                         message_id=waiting_message.message_id
                     )
                     waiting_message = None
 
         if waiting_message:
-            context.bot.delete_message(
-                chat_id=update.message.chat_id,
+            bot.delete_message(
+                chat_id=chat_id,
                 message_id=waiting_message.message_id
             )
-        update.message.reply_text(
+        reply_text(
             text="Surveillance mode stopped",
             reply_markup=self._get_reply_keyboard()
         )
-        self.logger.info('Surveillance mode stop')
+        logger.info('Surveillance mode stop')
+
+    def _send_video(
+            self,
+            context: CallbackContext,
+            chat_id: int,
+            video: IO
+    ) -> None:
+        """
+        Sends a video file and deletes it afterwards.
+
+        Videos are recorded into temporary files that are not needed any
+        more once uploaded, so they are removed to free up storage, even if
+        the upload fails.
+
+        Args:
+            context: The context object for the update.
+            chat_id: Unique identifier of the target chat.
+            video: File object of the video to be sent.
+        """
+        try:
+            with video:
+                self._send_with_retry(
+                    context.bot.send_video,
+                    chat_id=chat_id,
+                    video=video,
+                    supports_streaming=True
+                )
+        finally:
+            os.remove(video.name)
+
+    def _send_photos(
+            self,
+            context: CallbackContext,
+            chat_id: int,
+            photos: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Sends surveillance photos, as an album if there are more than one.
+
+        Args:
+            context: The context object for the update.
+            chat_id: Unique identifier of the target chat.
+            photos: Photo events yielded by `Camera.surveillance_start`.
+        """
+        if len(photos) == 1:
+            self._send_with_retry(
+                context.bot.send_photo,
+                chat_id=chat_id,
+                photo=photos[0]['photo'],
+                caption=f'Capture {photos[0]["id"]}/{photos[0]["total"]}'
+            )
+        else:
+            self._send_with_retry(
+                context.bot.send_media_group,
+                chat_id=chat_id,
+                media=[
+                    InputMediaPhoto(
+                        media=data['photo'],
+                        caption=f'Capture {data["id"]}/{data["total"]}'
+                    ) for data in photos
+                ]
+            )
+
+    def _send_with_retry(self, method: Callable[..., Any], **kwargs) -> Any:
+        """
+        Calls a bot method, retrying it while flood limits are exceeded.
+
+        When Telegram answers with a `RetryAfter` error, it waits the
+        requested time and calls the method again. File objects among the
+        arguments are rewound before retrying, so they are sent again from
+        the beginning.
+
+        Args:
+            method: Bot method to be called.
+            **kwargs: Arguments for the method.
+
+        Returns:
+            Value returned by the method.
+        """
+        while True:
+            try:
+                return method(**kwargs)
+            except RetryAfter as error:
+                logger.warning(
+                    'Flood limit exceeded, retrying in %s seconds',
+                    error.retry_after
+                )
+                sleep(error.retry_after)
+                for value in kwargs.values():
+                    if hasattr(value, 'seek'):
+                        value.seek(0)
+
+    def _surveillance_events(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Runs surveillance mode in a separated thread and yields its events.
+
+        Camera surveillance generator is consumed by a producer thread that
+        stores every event into a queue, so motion detection and video
+        recording keep going while previous events are being sent to the
+        user.
+
+        The queue is bounded by `EVENTS_QUEUE_SIZE`. When it is full, new
+        photo events are discarded, while the rest of events wait until
+        there is free space, so memory usage is limited if uploads can not
+        keep up with the camera.
+
+        Consecutive photo events already waiting in the queue (because the
+        previous upload took longer than the picture interval) are merged
+        into a single ``{'photos': [<photo event>, ...]}`` event, so they
+        can be sent together in one request.
+
+        Args:
+            **kwargs: Arguments for `Camera.surveillance_start` method.
+
+        Yields:
+            Every event yielded by `Camera.surveillance_start` method, with
+            photo events grouped as described above.
+        """
+        events: 'Queue[Any]' = Queue(self.EVENTS_QUEUE_SIZE)
+        pending: List[Any] = []
+        finished = False
+
+        def producer() -> None:
+            try:
+                for data in self.camera.surveillance_start(**kwargs):
+                    if 'photo' not in data:
+                        events.put(data)
+                        continue
+                    try:
+                        events.put_nowait(data)
+                    except Full:
+                        logger.warning(
+                            'Photo %s/%s discarded, uploads are too slow',
+                            data['id'],
+                            data['total']
+                        )
+            except Exception as error:  # pylint: disable=broad-except
+                events.put(error)
+            finally:
+                events.put(None)
+
+        Thread(target=producer, daemon=True).start()
+        try:
+            while True:
+                data = pending.pop() if pending else events.get()
+                if data is None:
+                    finished = True
+                    break
+                if isinstance(data, Exception):
+                    raise data
+                if 'photo' in data:
+                    photos = [data]
+                    while len(photos) < self.MEDIA_GROUP_SIZE \
+                            and not events.empty():
+                        data = events.get_nowait()
+                        if not isinstance(data, dict) or 'photo' not in data:
+                            pending.append(data)
+                            break
+                        photos.append(data)
+                    data = {'photos': photos}
+                yield data
+        finally:
+            # Stops producer if consumer ends unexpectedly
+            self.camera.surveillance_stop()
+            # Lets the producer end if it is waiting for free space, and
+            # deletes the videos that are not going to be sent
+            for data in pending:
+                self._discard_event(data)
+            while not finished and None not in pending:
+                data = events.get()
+                finished = data is None
+                self._discard_event(data)
+
+    @staticmethod
+    def _discard_event(data: Any) -> None:
+        """
+        Releases the resources of a surveillance event that is not sent.
+
+        Video events hold an open temporary file, so it is closed and
+        removed.
+
+        Args:
+            data: Event taken from the surveillance events queue.
+        """
+        if isinstance(data, dict) and 'video' in data:
+            data['video'].close()
+            os.remove(data['video'].name)
 
     def _command_surveillance_stop(
             self,
@@ -462,7 +903,7 @@ class Bot:
             update.message.reply_text(
                 text="Error! Surveillance is not started"
             )
-            self.logger.warning("Surveillance is not started")
+            logger.warning("Surveillance is not started")
             return
 
         # Stop surveillance.
@@ -4,7 +4,8 @@ Module for bot configuration functionality.
 This module contains the `BotConfig` class that implements a conversational
 sequence in order to configure the bot behavior.
 """
-from typing import TYPE_CHECKING, Callable, List
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 from telegram import (
     InlineKeyboardButton,
@@ -23,6 +24,24 @@ from telegram.ext import (
 if TYPE_CHECKING:  # pragma: no cover
     from surveillance_bot.bot import Bot  # pylint: disable=cyclic-import
 
+HandlerType = Callable[[Update, CallbackContext], Any]
+
+
+def _menu_keyboard(*options: Tuple[str, object]) -> InlineKeyboardMarkup:
+    """
+    Builds a menu inline keyboard with one option per row.
+
+    Args:
+        *options: Tuples with the text and the callback data of each option.
+
+    Returns:
+        The inline keyboard for the menu.
+    """
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(text=text, callback_data=str(data))]
+        for text, data in options
+    ])
+
 
 class BotConfig:
     """
@@ -41,6 +60,15 @@ class BotConfig:
     SRV_PICTURE_INTERVAL = 'srv_picture_interval'
     SRV_MOTION_CONTOURS = 'srv_motion_contours'
 
+    # Default values for configuration variables
+    _DEFAULTS = {
+        TIMESTAMP: True,
+        OD_VIDEO_DURATION: 5,
+        SRV_VIDEO_DURATION: 30,
+        SRV_PICTURE_INTERVAL: 5,
+        SRV_MOTION_CONTOURS: True
+    }
+
     # State definitions for top level conversation
     MAIN_MENU, GENERAL_CONFIG, SURVEILLANCE_CONFIG = map(chr, range(3))
 
@@ -62,6 +90,81 @@ class BotConfig:
     # Auxiliary constants
     CURRENT_VARIABLE, RETURN_HANDLER, ENABLE, DISABLE = map(chr, range(10, 14))
 
+    # Main menu text, escaped only once
+    _MAIN_MENU_TEXT = (
+        "*Surveillance Telegram Bot Configuration*\n"
+        "\n"
+        "Here you can modify some bot behavior parameters|. \n"
+        "\n"
+        "While the mode is running it does not allow you any change "
+        "unless you restart it|.\n"
+        "\n"
+        "To abort type /stop|_config|.\n"
+        "\n"
+        "Select section:"
+    ).replace('|', '\\')
+
+    # Config menu templates, escaped only once and formatted on every render
+    _GENERAL_TEXT = (
+        "*General configuration*\n"
+        "\n"
+        "__Timestamp__:\n"
+        " |- _Description_: Print a timestamp on every photo or"
+        " video taken|.\n"
+        " |- _Current value_: *{timestamp}*\n"
+        "\n"
+        "__On Demand video duration__:\n"
+        " |- _Description_: Duration of the video taken with "
+        "/get|_video command|.\n"
+        " |- _Current value_: *{video_duration} seconds*"
+    ).replace('|', '\\')
+    _SURVEILLANCE_TEXT = (
+        "*Surveillance Mode configuration*\n"
+        "\n"
+        "__Video duration__:\n"
+        " |- _Description_: Duration of the video taken when motion "
+        "is detected|.\n"
+        " |- _Current value_: *{video_duration} seconds*\n"
+        "\n"
+        "__Picture Interval__:\n"
+        " |- _Description_: Interval between photos taken after "
+        "motion is detected|.\n"
+        " |- _Current value_: *{picture_interval} seconds*\n"
+        "\n"
+        "__Draw motion contours__:\n"
+        " |- _Description_: Draws a rectangle around the objects in "
+        "motion|.\n"
+        " |- _Current value_: *{motion_contours}*"
+    ).replace('|', '\\')
+
+    # Inline keyboards (they never change, so they are built only once)
+    _MAIN_MENU_KEYBOARD = _menu_keyboard(
+        ('General configuration', GENERAL_CONFIG),
+        ('Surveillance mode configuration', SURVEILLANCE_CONFIG),
+        ('Done', END)
+    )
+    _GENERAL_KEYBOARD = _menu_keyboard(
+        ('Timestamp', CHANGE_TIMESTAMP),
+        ('On Demand video duration', CHANGE_OD_VIDEO_DURATION),
+        ('Back', END)
+    )
+    _SURVEILLANCE_KEYBOARD = _menu_keyboard(
+        ('Video duration', CHANGE_SRV_VIDEO_DURATION),
+        ('Picture Interval', CHANGE_SRV_PICTURE_INTERVAL),
+        ('Draw motion contours', CHANGE_SRV_MOTION_CONTOURS),
+        ('Back', END)
+    )
+    _BOOLEAN_KEYBOARD = InlineKeyboardMarkup([[
+        InlineKeyboardButton(
+            text='Enable',
+            callback_data=str(ENABLE)
+        ),
+        InlineKeyboardButton(
+            text='Disable',
+            callback_data=str(DISABLE)
+        ),
+    ]])
+
     @staticmethod
     def get_config_handler(bot: 'Bot') -> ConversationHandler:
         """
@@ -77,70 +180,38 @@ class BotConfig:
             entry_points=[bot.command_handler('config', BotConfig._main_menu)],
             states={
                 BotConfig.MAIN_MENU: [
-                    CallbackQueryHandler(
-                        BotConfig._general_config,
-                        pattern='^' + str(BotConfig.GENERAL_CONFIG) + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._surveillance_config,
-                        pattern='^' + str(BotConfig.SURVEILLANCE_CONFIG) + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._end,
-                        pattern='^' + str(BotConfig.END) + '$'
-                    )
+                    BotConfig._callback_handler({
+                        BotConfig.GENERAL_CONFIG: BotConfig._general_config,
+                        BotConfig.SURVEILLANCE_CONFIG:
+                            BotConfig._surveillance_config,
+                        BotConfig.END: BotConfig._end
+                    })
                 ],
                 BotConfig.GENERAL_CONFIG: [
-                    CallbackQueryHandler(
-                        BotConfig._change_timestamp,
-                        pattern='^'
-                        + str(BotConfig.CHANGE_TIMESTAMP)
-                        + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._change_od_video_duration,
-                        pattern='^'
-                        + str(BotConfig.CHANGE_OD_VIDEO_DURATION)
-                        + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._main_menu,
-                        pattern='^' + str(BotConfig.END) + '$'
-                    )
+                    BotConfig._callback_handler({
+                        BotConfig.CHANGE_TIMESTAMP:
+                            BotConfig._change_timestamp,
+                        BotConfig.CHANGE_OD_VIDEO_DURATION:
+                            BotConfig._change_od_video_duration,
+                        BotConfig.END: BotConfig._main_menu
+                    })
                 ],
                 BotConfig.SURVEILLANCE_CONFIG: [
-                    CallbackQueryHandler(
-                        BotConfig._change_srv_video_duration,
-                        pattern='^'
-                        + str(BotConfig.CHANGE_SRV_VIDEO_DURATION)
-                        + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._change_srv_picture_interval,
-                        pattern='^'
-                        + str(BotConfig.CHANGE_SRV_PICTURE_INTERVAL)
-                        + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._change_motion_contours,
-                        pattern='^'
-                        + str(BotConfig.CHANGE_SRV_MOTION_CONTOURS)
-                        + '$'
-                    ),
-                    CallbackQueryHandler(
-                        BotConfig._main_menu,
-                        pattern='^' + str(BotConfig.END) + '$'
-                    )
+                    BotConfig._callback_handler({
+                        BotConfig.CHANGE_SRV_VIDEO_DURATION:
+                            BotConfig._change_srv_video_duration,
+                        BotConfig.CHANGE_SRV_PICTURE_INTERVAL:
+                            BotConfig._change_srv_picture_interval,
+                        BotConfig.CHANGE_SRV_MOTION_CONTOURS:
+                            BotConfig._change_motion_contours,
+                        BotConfig.END: BotConfig._main_menu
+                    })
                 ],
                 BotConfig.BOOLEAN_INPUT: [
-                    CallbackQueryHandler(
-                        BotConfig._boolean_input,
-                        pattern='^'
-                        + str(BotConfig.ENABLE)
-                        + '$|^'
-                        + str(BotConfig.DISABLE)
-                        + '$'
-                    )
+                    BotConfig._callback_handler({
+                        BotConfig.ENABLE: BotConfig._boolean_input,
+                        BotConfig.DISABLE: BotConfig._boolean_input
+                    })
                 ],
                 BotConfig.INTEGER_INPUT: [
                     MessageHandler(
@@ -155,27 +226,61 @@ class BotConfig:
         return main_handler
 
     @staticmethod
-    def ensure_defaults(context: CallbackContext) -> None:
+    def _callback_handler(
+            callbacks: Dict[Any, HandlerType]
+    ) -> CallbackQueryHandler:
         """
-        Creates non-existent variables and populates with default values.
+        Generates a handler for the inline keyboard of a menu.
+
+        Instead of one handler with a regex pattern per button, a single
+        handler looks up the callback for the pressed button in a dict.
 
         Args:
-            context: The context object for the update.
+            callbacks: Callback for every button, keyed by its callback
+                data.
+
+        Returns:
+            The instantiated `CallbackQueryHandler`.
+        """
+        return CallbackQueryHandler(partial(
+            BotConfig._dispatch_callback,
+            {str(data): callback for data, callback in callbacks.items()}
+        ))
+
+    @staticmethod
+    def _dispatch_callback(
+            callbacks: Dict[str, HandlerType],
+            update: Update,
+            context: CallbackContext
+    ) -> Optional[str]:
         """
-        if BotConfig.TIMESTAMP not in context.bot_data:
-            context.bot_data[BotConfig.TIMESTAMP] = True
+        Invokes the callback for the button pressed by the user.
 
-        if BotConfig.OD_VIDEO_DURATION not in context.bot_data:
-            context.bot_data[BotConfig.OD_VIDEO_DURATION] = 5
+        Args:
+            callbacks: Callback for every button, keyed by its callback
+                data.
+            update: The update to be handled.
+            context: The context object for the update.
 
-        if BotConfig.SRV_VIDEO_DURATION not in context.bot_data:
-            context.bot_data[BotConfig.SRV_VIDEO_DURATION] = 30
+        Returns:
+            The state returned by the callback, or None (state unchanged) if
+            the button is unknown.
+        """
+        callback = callbacks.get(update.callback_query.data)
+        if callback is None:
+            return None
+        return callback(update, context)
 
-        if BotConfig.SRV_PICTURE_INTERVAL not in context.bot_data:
-            context.bot_data[BotConfig.SRV_PICTURE_INTERVAL] = 5
+    @staticmethod
+    def ensure_defaults(bot_data: Dict[Any, Any]) -> None:
+        """
+        Creates non-existent variables and populates with default values.
 
-        if BotConfig.SRV_MOTION_CONTOURS not in context.bot_data:
-            context.bot_data[BotConfig.SRV_MOTION_CONTOURS] = True
+        Args:
+            bot_data: Dictionary shared by all the bot handlers.
+        """
+        for variable, value in BotConfig._DEFAULTS.items():
+            bot_data.setdefault(variable, value)
 
     # Menus
 
@@ -193,32 +298,9 @@ class BotConfig:
         Returns:
             The state MAIN_MENU.
         """
-        text = "*Surveillance Telegram Bot Configuration*\n" \
-               "\n" \
-               "Here you can modify some bot behavior parameters|. \n" \
-               "\n" \
-               "While the mode is running it does not allow you any change " \
-               "unless you restart it|.\n" \
-               "\n" \
-               "To abort type /stop|_config|.\n" \
-               "\n" \
-               "Select section:".replace('|', '\\')
-        buttons = [
-            [InlineKeyboardButton(
-                text='General configuration',
-                callback_data=str(BotConfig.GENERAL_CONFIG)
-            )],
-            [InlineKeyboardButton(
-                text='Surveillance mode configuration',
-                callback_data=str(BotConfig.SURVEILLANCE_CONFIG)
-            )],
-            [InlineKeyboardButton(
-                text='Done',
-                callback_data=str(BotConfig.END)
-            )]
-        ]
-
-        BotConfig._render_menu(update, text, buttons)
+        BotConfig._render_menu(
+            update, BotConfig._MAIN_MENU_TEXT, BotConfig._MAIN_MENU_KEYBOARD
+        )
 
         return BotConfig.MAIN_MENU
 
@@ -239,34 +321,11 @@ class BotConfig:
 
         timestamp_str = 'Enabled' if timestamp else 'Disabled'
 
-        text = f"*General configuration*\n" \
-               f"\n" \
-               f"__Timestamp__:\n" \
-               f" |- _Description_: Print a timestamp on every photo or" \
-               f" video taken|.\n" \
-               f" |- _Current value_: *{timestamp_str}*\n" \
-               f"\n" \
-               f"__On Demand video duration__:\n" \
-               f" |- _Description_: Duration of the video taken with " \
-               f"/get|_video command|.\n" \
-               f" |- _Current value_: *{video_duration} seconds*" \
-               f"".replace('|', '\\')
-        buttons = [
-            [InlineKeyboardButton(
-                text='Timestamp',
-                callback_data=str(BotConfig.CHANGE_TIMESTAMP)
-            )],
-            [InlineKeyboardButton(
-                text='On Demand video duration',
-                callback_data=str(BotConfig.CHANGE_OD_VIDEO_DURATION)
-            )],
-            [InlineKeyboardButton(
-                text='Back',
-                callback_data=str(BotConfig.END)
-            )]
-        ]
-
-        BotConfig._render_menu(update, text, buttons)
+        text = BotConfig._GENERAL_TEXT.format(
+            timestamp=timestamp_str,
+            video_duration=video_duration
+        )
+        BotConfig._render_menu(update, text, BotConfig._GENERAL_KEYBOARD)
 
         return BotConfig.GENERAL_CONFIG
 
@@ -289,43 +348,12 @@ class BotConfig:
 
         motion_contours_str = 'Enabled' if motion_contours else 'Disabled'
 
-        text = f"*Surveillance Mode configuration*\n" \
-               f"\n" \
-               f"__Video duration__:\n" \
-               f" |- _Description_: Duration of the video taken when motion " \
-               f"is detected|.\n" \
-               f" |- _Current value_: *{video_duration} seconds*\n" \
-               f"\n" \
-               f"__Picture Interval__:\n" \
-               f" |- _Description_: Interval between photos taken after " \
-               f"motion is detected|.\n" \
-               f" |- _Current value_: *{picture_interval} seconds*\n" \
-               f"\n" \
-               f"__Draw motion contours__:\n" \
-               f" |- _Description_: Draws a rectangle around the objects in " \
-               f"motion|.\n" \
-               f" |- _Current value_: *{motion_contours_str}*" \
-               f"".replace('|', '\\')
-        buttons = [
-            [InlineKeyboardButton(
-                text='Video duration',
-                callback_data=str(BotConfig.CHANGE_SRV_VIDEO_DURATION)
-            )],
-            [InlineKeyboardButton(
-                text='Picture Interval',
-                callback_data=str(BotConfig.CHANGE_SRV_PICTURE_INTERVAL)
-            )],
-            [InlineKeyboardButton(
-                text='Draw motion contours',
-                callback_data=str(BotConfig.CHANGE_SRV_MOTION_CONTOURS)
-            )],
-            [InlineKeyboardButton(
-                text='Back',
-                callback_data=str(BotConfig.END)
-            )]
-        ]
-
-        BotConfig._render_menu(update, text, buttons)
+        text = BotConfig._SURVEILLANCE_TEXT.format(
+            video_duration=video_duration,
+            picture_interval=picture_interval,
+            motion_contours=motion_contours_str
+        )
+        BotConfig._render_menu(update, text, BotConfig._SURVEILLANCE_KEYBOARD)
 
         return BotConfig.SURVEILLANCE_CONFIG
 
@@ -333,19 +361,16 @@ class BotConfig:
     def _render_menu(
             update: Update,
             text: str,
-            buttons: List[List[InlineKeyboardButton]]
+            keyboard: InlineKeyboardMarkup
     ) -> None:
         """
-        Builds the inline keyboard for the menu and sends all to the user.
+        Sends the menu to the user.
 
         Args:
             update: The update to be handled.
             text: Text for the menu caption.
-            buttons: Array of button rows,
-                each represented by an Array of InlineKeyboardButton objects.
+            keyboard: Inline keyboard with the menu options.
         """
-        keyboard = InlineKeyboardMarkup(buttons)
-
         if update.message:
             update.message.reply_text(
                 text=text,
@@ -554,22 +579,10 @@ class BotConfig:
         context.user_data[BotConfig.CURRENT_VARIABLE] = current_variable
         context.user_data[BotConfig.RETURN_HANDLER] = return_handler
 
-        buttons = [[
-            InlineKeyboardButton(
-                text='Enable',
-                callback_data=str(BotConfig.ENABLE)
-            ),
-            InlineKeyboardButton(
-                text='Disable',
-                callback_data=str(BotConfig.DISABLE)
-            ),
-        ]]
-        keyboard = InlineKeyboardMarkup(buttons)
-
         update.callback_query.answer()
         update.callback_query.edit_message_text(
             text=text,
-            reply_markup=keyboard,
+            reply_markup=BotConfig._BOOLEAN_KEYBOARD,
             parse_mode=ParseMode.MARKDOWN_V2
         )
 
@@ -642,11 +655,10 @@ class BotConfig:
             The execution of the previously stored handler or the state
                 INTEGER_INPUT in case of validation error.
         """
-        try:
-            value = int(update.message.text)
-            if value < 1 or value > 99:
-                raise ValueError
-        except ValueError:
+        # Valid values have up to two digits, longer inputs are not parsed
+        text = update.message.text.strip()
+        value = int(text) if text.isdecimal() and len(text) <= 2 else 0
+        if not 1 <= value <= 99:
             update.message.reply_text(
                 text='Invalid value, insert an integer number between 1 and 99'
             )
@@ -7,8 +7,7 @@ camera and image operations are performed using OpenCV.
 """
 import os
 from datetime import datetime
-from io import BytesIO
-from tempfile import TemporaryDirectory
+from tempfile import TemporaryDirectory, mkstemp
 from threading import Lock, Thread
 from time import time
 from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
@@ -174,7 +173,7 @@ class Camera:
         """Stops camera device."""
         self._camera.stop()
 
-    def get_photo(self, timestamp=True) -> IO:
+    def get_photo(self, timestamp=True) -> bytes:
         """
         Takes a single shot.
 
@@ -182,10 +181,10 @@ class Camera:
             timestamp: Adds time stamping on the photo.
 
         Returns:
-            File object with the photo taken.
+            JPEG encoded bytes of the photo taken.
         """
         frame = self._camera.read(timestamp=timestamp)[1]
-        return BytesIO(cv2.imencode(".jpg", frame)[1])
+        return cv2.imencode(".jpg", frame)[1].tobytes()
 
     def get_video(self, timestamp=True, seconds=5) -> IO:
         """Takes a video.
@@ -331,7 +330,11 @@ class Camera:
             A dict with three possible configurations
                 * ``{'detected': True}``
                 * ``{'video': <IO>}``
-                * ``{'photo': <IO>, 'id': <int>, 'total': <int>}``
+                * ``{'photo': <bytes>, 'id': <int>, 'total': <int>}``
+
+            The video file object is not closed by this generator, so it
+            remains readable after the generator is resumed. Closing it is
+            the caller's responsibility.
         """
         status = Camera.STATE_IDLE
         fps = self._camera.fps
@@ -355,7 +358,7 @@ class Camera:
             if status == Camera.STATE_MOTION_DETECTED:
                 if not len(processed) % int(fps * picture_seconds):
                     yield {
-                        'photo': BytesIO(cv2.imencode(".jpg", frame)[1]),
+                        'photo': cv2.imencode(".jpg", frame)[1].tobytes(),
                         'id': (len(processed) // int(fps * picture_seconds)),
                         'total': video_seconds // picture_seconds
                     }
@@ -365,8 +368,7 @@ class Camera:
                         video_writer.write(frame)
                 else:
                     video_writer.release()
-                    with open(path, 'rb') as file_handler:
-                        yield {'video': file_handler}
+                    yield {'video': open(path, 'rb')}  # pylint: disable=R1732
                     status = Camera.STATE_IDLE
 
     def surveillance_stop(self) -> None:
@@ -385,6 +387,8 @@ class Camera:
         """
         Initializes a temporary video file and a video writer.
 
+        Filenames start with the current date and time and are made unique,
+        so videos recorded at the same time do not overwrite each other.
 
         Args:
             event_type: Event type string for filename generation.
@@ -394,9 +398,13 @@ class Camera:
         """
         now_str = str(datetime.now())[:-7]
         table = str.maketrans(': ', '-_')
-        filename = now_str.translate(table) + f'_{event_type}.mp4'
+        file_descriptor, path = mkstemp(
+            suffix=f'_{event_type}.mp4',
+            prefix=now_str.translate(table) + '_',
+            dir=self._tempdir.name
+        )
+        os.close(file_descriptor)
 
-        path = os.path.join(self._tempdir.name, filename)
         writer = cv2.VideoWriter(
             path,
             cv2.VideoWriter_fourcc(*self._codec),
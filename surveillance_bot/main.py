@@ -10,6 +10,9 @@ BOT_API_TOKEN = os.environ.get('BOT_API_TOKEN', '')
 PERSISTENCE_DIR = os.environ.get('PERSISTENCE_DIR', None)
 LOG_LEVEL = os.environ.get('LOG_LEVEL', logging.WARNING)
 BOT_LOG_LEVEL = os.environ.get('BOT_LOG_LEVEL', None)
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL', None)
+WEBHOOK_PORT = int(os.environ.get('WEBHOOK_PORT') or 8443)
+BOT_API_URL = os.environ.get('BOT_API_URL', None)
 
 
 # Logging config.
@@ -17,6 +20,10 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=LOG_LEVEL
 )
+# Log format doesn't use thread nor process info, skip gathering it.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.captureWarnings(True)
 logging.getLogger('py.warnings').setLevel(logging.ERROR)
 
@@ -27,7 +34,10 @@ def main() -> None:
         token=BOT_API_TOKEN,
         username=AUTHORIZED_USER,
         persistence_dir=PERSISTENCE_DIR,
-        log_level=BOT_LOG_LEVEL
+        log_level=BOT_LOG_LEVEL,
+        webhook_url=WEBHOOK_URL,
+        webhook_port=WEBHOOK_PORT,
+        api_url=BOT_API_URL
     )
     surveillance_bot.start()
 
@@ -2,10 +2,13 @@
 Helper module for bot related mocking.
 """
 from threading import Thread
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from unittest.mock import MagicMock
 
 import pytest_mock
+from telegram.ext import MessageHandler
+
+from surveillance_bot.bot_config import BotConfig
 
 
 class DispatcherMock(MagicMock):
@@ -14,19 +17,47 @@ class DispatcherMock(MagicMock):
         super().__init__(*args, **kwargs)
         self.commands: Dict[str, Callable] = {}
         self.threads: List[Thread] = []
+        self.fallback: Optional[Callable] = None
+        self.bot_data: Dict = {}
 
     def add_handler(self, handler) -> None:
         """
         Stores a command handler data.
 
+        Commands filtered out are redirected to the stored message handler
+        (the one for unauthorized calls).
+
         Args:
-            handler: Command handler to store.
+            handler: Command or message handler to store.
         """
         if hasattr(handler, 'command'):
             if handler.run_async:
-                self.commands[handler.command[0]] = self.mock_run_async(handler.callback)
+                callback = self.mock_run_async(handler.callback)
             else:
-                self.commands[handler.command[0]] = handler.callback
+                callback = handler.callback
+            self.commands[handler.command[0]] = self.mock_filters(
+                handler.filters,
+                callback
+            )
+        elif isinstance(handler, MessageHandler):
+            self.fallback = handler.callback
+
+    def mock_filters(self, filters, func):
+        """
+        Decorates a function to execute it only if filters are passed.
+
+        Args:
+            filters: Filters of the handler.
+            func: Function to be decorated.
+
+        Returns:
+            Decorated function.
+        """
+        def wrapped(update, context):
+            if filters(update):
+                return func(update, context)
+            return self.fallback(update, context)
+        return wrapped
 
     def mock_run_async(self, func):
         """
@@ -75,6 +106,8 @@ def get_mocked_update_object() -> MagicMock:
     """
     update = MagicMock()
     update.effective_chat.username = 'FAKE_USER'
+    update.effective_message.chat = update.effective_chat
+    update.message.text = '/fake_command'
 
     def answer():
         update.callback_query.answered = True
@@ -88,15 +121,36 @@ def get_mocked_context_object() -> MagicMock:
     """
     Mocks telegram context update object.
 
+    Bot data is populated with defaults configuration options, as the bot
+    does at start-up.
+
     Returns:
         A mocked telegram context update instance.
     """
     context = MagicMock()
     context.bot_data = {}
+    BotConfig.ensure_defaults(context.bot_data)
     context.user_data = {}
+    context.dispatcher.run_async = run_sync
     return context
 
 
+def run_sync(func: Callable, *args, **kwargs) -> MagicMock:
+    """
+    Simulates dispatcher `run_async` method running the function in place.
+
+    Args:
+        func: Function to be run.
+        *args: Positional arguments for the function.
+        **kwargs: Named arguments for the function.
+
+    Returns:
+        A mocked promise object.
+    """
+    func(*args, **kwargs)
+    return MagicMock()
+
+
 def get_kwargs_grabber() -> Tuple[List, Callable]:
     """
     Creates a grabber function to capture the named arguments that the
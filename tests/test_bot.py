@@ -2,16 +2,20 @@
 Test suite for Bot class testing.
 """
 import logging
+import os
 from hashlib import md5
+from io import BytesIO
+from threading import Event
 from time import sleep
 
 import _pytest.logging
 import _pytest.tmpdir
 import pytest
 import pytest_mock
+from telegram.error import NetworkError, RetryAfter
 
 from opencv_mock import FRAMES_MD5, mock_bad_video_writer, mock_video_capture
-from surveillance_bot.bot import Bot
+from surveillance_bot.bot import Bot, logger
 from telegram_bot_mock import (
     get_kwargs_grabber,
     get_mocked_context_object,
@@ -109,11 +113,11 @@ def test_init_logging_level(mocker: pytest_mock.mocker) -> None:
     mock_telegram_updater(mocker)
     mock_video_capture(mocker, reader=False)
 
-    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER', log_level='WARNING')
-    assert bot.logger.getEffectiveLevel() == logging.WARNING
+    Bot(token='FAKE_TOKEN', username='FAKE_USER', log_level='WARNING')
+    assert logger.getEffectiveLevel() == logging.WARNING
 
-    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER', log_level='INFO')
-    assert bot.logger.getEffectiveLevel() == logging.INFO
+    Bot(token='FAKE_TOKEN', username='FAKE_USER', log_level='INFO')
+    assert logger.getEffectiveLevel() == logging.INFO
 
 
 def test_persistence_dir(
@@ -156,6 +160,9 @@ def test_start_and_stop(
     mock_video_capture(mocker, reader=False)
     bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
     bot.start()
+    polling_kwargs = bot.updater.start_polling.call_args[1]
+    assert polling_kwargs['timeout'] == 50
+    assert polling_kwargs['allowed_updates'] == ['message', 'callback_query']
     assert len(caplog.records) == 2
     record = caplog.records[0]
     assert record.levelno == logging.INFO
@@ -165,6 +172,78 @@ def test_start_and_stop(
     assert 'stopped' in record.message
 
 
+def test_commands_registration(mocker: pytest_mock.mocker) -> None:
+    """
+    Tests that every bot command is registered in the dispatcher.
+
+    Args:
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    assert set(bot.updater.dispatcher.commands) == {
+        'start',
+        'help',
+        'get_photo',
+        'get_video',
+        'surveillance_start',
+        'surveillance_stop',
+        'surveillance_status'
+    }
+
+
+def test_start_webhook(mocker: pytest_mock.mocker) -> None:
+    """
+    Tests Bot process starting with a webhook for updates reception.
+
+    Args:
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(
+        token='FAKE_TOKEN',
+        username='FAKE_USER',
+        webhook_url='https://example.com/bot/',
+        webhook_port=8080
+    )
+    bot.updater.bot.token = 'FAKE_TOKEN'
+    bot.start()
+
+    bot.updater.start_polling.assert_not_called()
+    webhook_kwargs = bot.updater.start_webhook.call_args[1]
+    assert webhook_kwargs['port'] == 8080
+    assert webhook_kwargs['url_path'] == 'FAKE_TOKEN'
+    assert webhook_kwargs['webhook_url'] == \
+        'https://example.com/bot/FAKE_TOKEN'
+
+
+def test_api_url(mocker: pytest_mock.mocker) -> None:
+    """
+    Tests Bot instance using a self-hosted Bot API server.
+
+    Args:
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+
+    # Updater mock keeps its constructor arguments as attributes
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+    assert bot.updater.base_url is None
+    assert bot.updater.base_file_url is None
+
+    bot = Bot(
+        token='FAKE_TOKEN',
+        username='FAKE_USER',
+        api_url='http://127.0.0.1:8081/'
+    )
+    assert bot.updater.base_url == 'http://127.0.0.1:8081/bot'
+    assert bot.updater.base_file_url == 'http://127.0.0.1:8081/file/bot'
+
+
 def test_command_wrapper(
         caplog: _pytest.logging.caplog,
         mocker: pytest_mock.mocker
@@ -184,8 +263,12 @@ def test_command_wrapper(
     context = get_mocked_context_object()
 
     # Checks default configuration
+    assert len(bot.updater.dispatcher.bot_data) == 5
+
+    # Usernames are case insensitive
+    update.effective_chat.username = 'fake_user'
     bot.updater.dispatcher.commands['start'](update, context)
-    assert len(context.bot_data) == 5
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
 
     # Unauthorized
     update.effective_chat.username = 'BAD_USER'
@@ -194,6 +277,19 @@ def test_command_wrapper(
     record: logging.LogRecord = caplog.records[0]
     assert record.levelno == logging.WARNING
     assert 'Unauthorized' in record.message
+    assert update.message.reply_text.call_count == 3
+
+    # Unauthorized replies are throttled
+    bot.updater.dispatcher.commands['start'](update, context)
+    assert len(caplog.records) == 2
+    assert update.message.reply_text.call_count == 3
+
+    # Expired replies are forgotten
+    mocker.patch.object(Bot, 'UNAUTHORIZED_REPLY_INTERVAL', 0)
+    bot.updater.dispatcher.commands['start'](update, context)
+    assert len(caplog.records) == 3
+    assert update.message.reply_text.call_count == 4
+    assert len(getattr(bot, '_unauthorized_replies')) == 1
 
 
 def test_error_handler(
@@ -225,6 +321,41 @@ def test_error_handler(
     assert len(parameters) == 1
     assert 'internal error' in parameters[0]['text']
 
+    # Errors without update are only logged
+    getattr(bot, '_error')(None, context)
+    assert len(caplog.records) == 2
+    assert len(parameters) == 1
+
+
+def test_chat_action_deduplication(mocker: pytest_mock.mocker) -> None:
+    """
+    Tests that a chat action is not sent again while it is still shown.
+
+    Args:
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    context = get_mocked_context_object()
+    parameters, context.bot.send_chat_action = get_kwargs_grabber()
+
+    send_chat_action = getattr(bot, '_send_chat_action')
+    send_chat_action(context, 1, 'record_video')
+    send_chat_action(context, 1, 'record_video')
+    assert len(parameters) == 1
+
+    # Different action or chat
+    send_chat_action(context, 1, 'upload_video')
+    send_chat_action(context, 2, 'upload_video')
+    assert len(parameters) == 3
+
+    # Expired action
+    mocker.patch.object(Bot, 'CHAT_ACTION_DURATION', 0)
+    send_chat_action(context, 2, 'upload_video')
+    assert len(parameters) == 4
+
 
 def test_start_command(mocker: pytest_mock.mocker) -> None:
     """
@@ -276,8 +407,9 @@ def test_get_photo_command(mocker: pytest_mock.mocker) -> None:
     photo_params, context.bot.send_photo = get_kwargs_grabber()
 
     bot.updater.dispatcher.commands['get_photo'](update, context)
-    assert action_params[0]['action'] == 'upload_photo'
-    assert md5(photo_params[0]['photo'].read()).hexdigest() in FRAMES_MD5
+    bot.updater.dispatcher.threads[0].join()
+    assert not action_params
+    assert md5(photo_params[0]['photo']).hexdigest() in FRAMES_MD5
     bot.camera.stop()
 
 
@@ -299,12 +431,25 @@ def test_get_video_command(mocker: pytest_mock.mocker) -> None:
     context.bot_data['od_video_duration'] = 0.1
 
     action_params, context.bot.send_chat_action = get_kwargs_grabber()
-    video_params, context.bot.send_video = get_kwargs_grabber()
+    video_params, send_video = get_kwargs_grabber()
+    headers = []
+
+    def video_reader(**kwargs) -> None:
+        headers.append(kwargs['video'].read(12))
+        send_video(**kwargs)
+
+    context.bot.send_video = video_reader
 
     bot.updater.dispatcher.commands['get_video'](update, context)
+    bot.updater.dispatcher.threads[0].join()
+    assert len(action_params) == 1
     assert action_params[0]['action'] == 'record_video'
-    assert action_params[1]['action'] == 'upload_video'
-    assert video_params[0]['video'].read(12) == b'\x00\x00\x00\x1cftypisom'
+    assert headers[0] == b'\x00\x00\x00\x1cftypisom'
+    assert video_params[0]['supports_streaming'] is True
+
+    # Video file is removed after sending it
+    assert video_params[0]['video'].closed
+    assert not os.path.exists(video_params[0]['video'].name)
     bot.camera.stop()
 
 
@@ -334,7 +479,7 @@ def test_surveillance_start_command(mocker: pytest_mock.mocker) -> None:
     while not bot.camera.is_surveillance_active:
         pass
     bot.updater.dispatcher.commands['surveillance_status'](update, context)
-    while len(action_params) < 4:
+    while len(action_params) < 3:
         pass
     bot.updater.dispatcher.commands['surveillance_stop'](update, context)
 
@@ -347,11 +492,174 @@ def test_surveillance_start_command(mocker: pytest_mock.mocker) -> None:
 
     assert action_params[0]['action'] == 'record_video'
     assert action_params[1]['action'] == 'upload_photo'
-    assert action_params[2]['action'] == 'record_video'
-    assert action_params[3]['action'] == 'upload_video'
+    assert action_params[2]['action'] == 'upload_video'
     bot.camera.stop()
 
 
+def test_send_photos(mocker: pytest_mock.mocker) -> None:
+    """
+    Tests surveillance photos sending, grouping them in an album.
+
+    Args:
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    context = get_mocked_context_object()
+    photo_params, context.bot.send_photo = get_kwargs_grabber()
+    group_params, context.bot.send_media_group = get_kwargs_grabber()
+
+    photos = [{'photo': b'FAKE_PHOTO', 'id': i, 'total': 3} for i in (1, 2, 3)]
+    send_photos = getattr(bot, '_send_photos')
+
+    # Single photo
+    send_photos(context, 1, photos[:1])
+    assert len(photo_params) == 1
+    assert photo_params[0]['caption'] == 'Capture 1/3'
+
+    # Album
+    send_photos(context, 1, photos)
+    assert len(photo_params) == 1
+    assert len(group_params) == 1
+    assert [media.caption for media in group_params[0]['media']] == [
+        'Capture 1/3',
+        'Capture 2/3',
+        'Capture 3/3'
+    ]
+
+
+def test_send_with_retry(
+        caplog: _pytest.logging.caplog,
+        mocker: pytest_mock.mocker
+) -> None:
+    """
+    Tests bot methods retrying when flood limits are exceeded.
+
+    Args:
+        caplog: Fixture for log messages capturing.
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    video = BytesIO(b'FAKE_VIDEO')
+    headers = []
+
+    def send_video(**kwargs):
+        headers.append(kwargs['video'].read())
+        if len(headers) == 1:
+            raise RetryAfter(0)
+        return 'sent'
+
+    send_with_retry = getattr(bot, '_send_with_retry')
+    assert send_with_retry(send_video, video=video) == 'sent'
+    assert headers == [b'FAKE_VIDEO', b'FAKE_VIDEO']
+    assert len(caplog.records) == 1
+    assert 'Flood limit exceeded' in caplog.records[0].message
+
+
+def test_send_video_failure(
+        tmp_path: _pytest.tmpdir.tmp_path,
+        mocker: pytest_mock.mocker
+) -> None:
+    """
+    Tests that video files are removed even if they can not be sent.
+
+    Args:
+        tmp_path: Fixture for temporary path handling.
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'FAKE_VIDEO')
+    video = open(path, 'rb')
+
+    context = get_mocked_context_object()
+    context.bot.send_video = mocker.Mock(side_effect=NetworkError('FAKE'))
+
+    with pytest.raises(NetworkError):
+        getattr(bot, '_send_video')(context, 1, video)
+    assert video.closed
+    assert not path.exists()
+
+
+def test_surveillance_events_queue(
+        caplog: _pytest.logging.caplog,
+        mocker: pytest_mock.mocker
+) -> None:
+    """
+    Tests that photo events are discarded while the events queue is full.
+
+    Args:
+        caplog: Fixture for log messages capturing.
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    mocker.patch.object(Bot, 'EVENTS_QUEUE_SIZE', 1)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    resume = Event()
+    finished = Event()
+
+    def surveillance_start(**_):
+        yield {'detected': True}
+        resume.wait()
+        for i in (1, 2, 3):
+            yield {'photo': b'FAKE_PHOTO', 'id': i, 'total': 3}
+        finished.set()
+
+    bot.camera.surveillance_start = surveillance_start
+    events = getattr(bot, '_surveillance_events')()
+
+    assert next(events) == {'detected': True}
+    resume.set()
+    finished.wait()
+    assert list(events) == [
+        {'photos': [{'photo': b'FAKE_PHOTO', 'id': 1, 'total': 3}]}
+    ]
+    assert len(caplog.records) == 2
+    assert 'Photo 2/3 discarded' in caplog.records[0].message
+
+
+def test_surveillance_events_discarded(
+        tmp_path: _pytest.tmpdir.tmp_path,
+        mocker: pytest_mock.mocker
+) -> None:
+    """
+    Tests that queued videos are removed when events stop being consumed.
+
+    Args:
+        tmp_path: Fixture for temporary path handling.
+        mocker: Fixture for object mocking.
+    """
+    mock_telegram_updater(mocker)
+    mock_video_capture(mocker, reader=False)
+    bot = Bot(token='FAKE_TOKEN', username='FAKE_USER')
+
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'FAKE_VIDEO')
+    video = open(path, 'rb')
+
+    def surveillance_start(**_):
+        yield {'detected': True}
+        yield {'video': video}
+
+    bot.camera.surveillance_start = surveillance_start
+    events = getattr(bot, '_surveillance_events')()
+
+    assert next(events) == {'detected': True}
+    events.close()
+    assert video.closed
+    assert not path.exists()
+
+
 def test_surveillance_errors(mocker: pytest_mock.mocker) -> None:
     """
     Tests errors in "start" command invocation.
@@ -22,11 +22,32 @@ def test_get_config_handler() -> None:
     assert BotConfig.INTEGER_INPUT in handler.states
 
 
+def test_dispatch_callback() -> None:
+    """Tests menu buttons dispatching."""
+    update = get_mocked_update_object()
+    context = get_mocked_context_object()
+    dispatch_callback = getattr(BotConfig, '_dispatch_callback')
+
+    update.callback_query.data = 'fake_button'
+    assert dispatch_callback(
+        {'fake_button': fake_handler},
+        update,
+        context
+    ) == 'fake_return'
+
+    update.callback_query.data = 'unknown_button'
+    assert dispatch_callback(
+        {'fake_button': fake_handler},
+        update,
+        context
+    ) is None
+
+
 def test_ensure_defaults() -> None:
     """Tests default configuration generation."""
-    context = get_mocked_context_object()
-    BotConfig.ensure_defaults(context)
-    assert context.bot_data == {
+    bot_data = {}
+    BotConfig.ensure_defaults(bot_data)
+    assert bot_data == {
         'timestamp': True,
         'od_video_duration': 5,
         'srv_video_duration': 30,
@@ -34,6 +55,11 @@ def test_ensure_defaults() -> None:
         'srv_motion_contours': True
     }
 
+    # Existing values are kept
+    bot_data['timestamp'] = False
+    BotConfig.ensure_defaults(bot_data)
+    assert bot_data['timestamp'] is False
+
 
 def test_main_menu() -> None:
     """Tests main menu generation."""
@@ -86,7 +112,6 @@ def test_general_config() -> None:
     context = get_mocked_context_object()
 
     parameters, update.message.reply_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     assert getattr(BotConfig, '_general_config')(
         update,
         context
@@ -125,7 +150,6 @@ def test_surveillance_config() -> None:
     context = get_mocked_context_object()
 
     parameters, update.message.reply_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     assert getattr(BotConfig, '_surveillance_config')(
         update,
         context
@@ -167,7 +191,6 @@ def test_change_timestamp() -> None:
     context = get_mocked_context_object()
 
     parameters, update.callback_query.edit_message_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     getattr(BotConfig, '_change_timestamp')(update, context)
     assert '*Timestamp*' in parameters[0]['text']
 
@@ -178,7 +201,6 @@ def test_change_od_video_duration() -> None:
     context = get_mocked_context_object()
 
     parameters, update.callback_query.edit_message_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     getattr(BotConfig, '_change_od_video_duration')(update, context)
     assert '*On Demand video duration*' in parameters[0]['text']
 
@@ -189,7 +211,6 @@ def test_change_srv_video_duration() -> None:
     context = get_mocked_context_object()
 
     parameters, update.callback_query.edit_message_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     getattr(BotConfig, '_change_srv_video_duration')(update, context)
     assert '*Surveillance video duration*' in parameters[0]['text']
 
@@ -200,7 +221,6 @@ def test_change_srv_picture_interval() -> None:
     context = get_mocked_context_object()
 
     parameters, update.callback_query.edit_message_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     getattr(BotConfig, '_change_srv_picture_interval')(update, context)
     assert '*Surveillance picture interval*' in parameters[0]['text']
 
@@ -211,7 +231,6 @@ def test_change_motion_contours() -> None:
     context = get_mocked_context_object()
 
     parameters, update.callback_query.edit_message_text = get_kwargs_grabber()
-    BotConfig.ensure_defaults(context)
     getattr(BotConfig, '_change_motion_contours')(update, context)
     assert '*Motion contours*' in parameters[0]['text']
 
@@ -307,9 +326,14 @@ def test_integer_input() -> None:
     ) == 'fake_return'
     assert context.bot_data['fake_variable'] == 42
 
+    # Surrounding whitespace is ignored
+    update.message.text = ' 7\n'
+    getattr(BotConfig, '_integer_input')(update, context)
+    assert context.bot_data['fake_variable'] == 7
+
     # Invalid values
     params, update.message.reply_text = get_kwargs_grabber()
-    for value in ('-1', '101', 'BAD_TYPE'):
+    for value in ('-1', '0', '101', '4.2', '9' * 5000, 'BAD_TYPE', ''):
         update.message.text = value
         assert getattr(BotConfig, '_integer_input')(
             update,
@@ -65,11 +65,11 @@ def test_get_photo(mocker: pytest_mock.mocker) -> None:
 
     # Photo without timestamp
     image = camera.get_photo(False)
-    assert md5(image.read()).hexdigest() in FRAMES_MD5
+    assert md5(image).hexdigest() in FRAMES_MD5
 
     # Photo with timestamp
     image = camera.get_photo()
-    assert md5(image.read()).hexdigest() not in FRAMES_MD5
+    assert md5(image).hexdigest() not in FRAMES_MD5
 
     camera.stop()
 